@@ -24,16 +24,63 @@ Dependencias requeridas:
 
 import sys
 import argparse
-import markdown
 import asyncio
 import base64
+import hashlib
+import html
 import mimetypes
+import mmap
+import os
 import re
+import shutil
+import string
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Tuple
-from urllib.parse import urlparse
-from playwright.async_api import async_playwright
-import aiohttp
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+
+# markdown, playwright y aiohttp se importan al usarse: así --help y los errores
+# de argumentos responden sin pagar su tiempo de importación
+if TYPE_CHECKING:
+    import aiohttp
+
+
+# Directorio de caché persistente del conversor
+CACHE_DIR = Path.home() / '.cache' / 'md_to_pdf'
+
+# Patrones precompilados (se reutilizan en cada documento)
+_IMG = r'(?P<img><img[^>]*src=["\'](?P<src>[^"\']*)["\'][^>]*>)'
+_MERMAID = r'(?P<mermaid><pre><code class="language-mermaid">(?P<mermaid_code>.*?)</code></pre>)'
+# Bloque ($$...$$) antes que inline ($...$) para no contar un bloque dos veces
+_LATEX = r'(?P<block_latex>\$\$[^$]+\$\$)|(?P<inline_latex>\$[^$]+\$)'
+
+# Una sola pasada sobre el HTML para las sustituciones (Mermaid e imágenes)
+_CONTENT_RE = re.compile('|'.join((_MERMAID, _IMG)), re.DOTALL | re.IGNORECASE)
+# LaTeX solo se cuenta para el log, y únicamente en el texto entre sustituciones:
+# en la misma alternancia, dos '$' (precios, prompts) se tragarían un Mermaid o un <img>
+_LATEX_RE = re.compile(_LATEX, re.DOTALL)
+# Comprobación previa barata con la misma insensibilidad a mayúsculas que _CONTENT_RE
+_CONTENT_HINT_RE = re.compile(r'<img|language-mermaid', re.IGNORECASE)
+
+# Referencias que Chromium tendría que descargar (los enlaces <a href> no cuentan)
+_REMOTE_REF_RE = re.compile(
+    r'\bsrc=["\']?(?:https?:)?//|<link\b[^>]*\bhref=["\']?(?:https?:)?//|url\(\s*["\']?(?:https?:)?//|@import',
+    re.IGNORECASE
+)
+
+# Caché de tipos MIME por extensión
+_MIME_TYPES = {}
+
+
+def _guess_mime_type(suffix: str) -> str:
+    """Devuelve el tipo MIME para una extensión de archivo (por defecto image/png)."""
+    suffix = suffix.lower()
+    mime_type = _MIME_TYPES.get(suffix)
+    if mime_type is None:
+        mime_type = _MIME_TYPES[suffix] = mimetypes.guess_type(f"image{suffix}")[0] or 'image/png'
+    return mime_type
 
 
 class TemplateManager:
@@ -43,18 +90,32 @@ class TemplateManager:
         self.script_dir = script_dir
         self.css_file = script_dir / "default.css"
         self.html_file = script_dir / "default.html"
+        # Contenido leído por ruta, invalidado si cambia la fecha de modificación
+        self._file_cache = {}
+        self._parsed_template = (None, [])
+    
+    def _read_cached(self, path: Path) -> str:
+        """Lee un archivo de texto reutilizando la lectura anterior si no cambió."""
+        mtime = path.stat().st_mtime_ns
+        cached = self._file_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        content = path.read_bytes().decode('utf-8')
+        self._file_cache[path] = (mtime, content)
+        return content
     
     def load_css(self, custom_css_file: Optional[Path] = None) -> str:
         """Carga CSS personalizado o el predeterminado."""
         if custom_css_file and custom_css_file.is_file():
             try:
-                return custom_css_file.read_text(encoding='utf-8')
+                return self._read_cached(custom_css_file)
             except Exception as e:
                 raise FileNotFoundError(f"Error al cargar CSS personalizado {custom_css_file}: {e}")
         
         if self.css_file.is_file():
             try:
-                return self.css_file.read_text(encoding='utf-8')
+                return self._read_cached(self.css_file)
             except Exception as e:
                 raise FileNotFoundError(f"Error al cargar default.css: {e}")
         
@@ -64,231 +125,761 @@ class TemplateManager:
         """Carga la plantilla HTML."""
         if self.html_file.is_file():
             try:
-                return self.html_file.read_text(encoding='utf-8')
+                return self._read_cached(self.html_file)
             except Exception as e:
                 raise FileNotFoundError(f"Error al cargar default.html: {e}")
         
         raise FileNotFoundError(f"Archivo default.html no encontrado en {self.script_dir}")
     
-    def create_html_document(self, html_body: str, css_content: str, title: str) -> str:
-        """Crea documento HTML completo usando la plantilla."""
+    def _parse_template(self) -> List[Tuple[str, Optional[str]]]:
+        """Analiza la plantilla una sola vez en pares (texto literal, campo)."""
         template = self.load_html_template()
-        return template.format(
-            title=title,
-            css_content=css_content,
-            html_body=html_body
-        )
+        if self._parsed_template[0] is not template:
+            parsed = [(text, field) for text, field, _, _ in string.Formatter().parse(template)]
+            self._parsed_template = (template, parsed)
+        return self._parsed_template[1]
+    
+    def specialize_template(self, css_content: str, head_assets: str = "") -> List[str]:
+        """Pre-aplica CSS y assets a la plantilla.
+        
+        Devuelve una lista de segmentos donde las posiciones pares son texto literal
+        y las impares el nombre de un campo pendiente ({title} o {html_body}).
+        """
+        fixed = {'css_content': css_content, 'head_assets': head_assets}
+        segments = []
+        literal = []
+        for text, field in self._parse_template():
+            literal.append(text)
+            if field is None:
+                continue
+            if field in fixed:
+                literal.append(fixed[field])
+            else:
+                segments.append("".join(literal))
+                segments.append(field)
+                literal = []
+        segments.append("".join(literal))
+        return segments
+    
+    @staticmethod
+    def render_template(segments: List[str], title: str, html_body: str) -> str:
+        """Completa una plantilla especializada con el título y el cuerpo."""
+        values = {'title': title, 'html_body': html_body}
+        return "".join(values[segment] if i % 2 else segment for i, segment in enumerate(segments))
+    
+    def create_html_document(self, html_body: str, css_content: str, title: str,
+                             head_assets: str = "") -> str:
+        """Crea documento HTML completo usando la plantilla."""
+        return self.render_template(self.specialize_template(css_content, head_assets), title, html_body)
+
+
+class AssetManager:
+    """Gestor de assets de KaTeX y Mermaid.
+    
+    Los assets se descargan una sola vez en la caché local y se incrustan en el
+    HTML, evitando las descargas desde el CDN dentro de Chromium en cada conversión.
+    Si la descarga falla se usan las etiquetas del CDN como respaldo.
+    """
+    
+    KATEX_URL = 'https://cdn.jsdelivr.net/npm/katex@0.16.8/dist/'
+    MERMAID_URL = 'https://cdnjs.cloudflare.com/ajax/libs/mermaid/10.6.1/mermaid.min.js'
+    
+    ASSETS = {
+        'katex': {
+            'katex.min.css': KATEX_URL + 'katex.min.css',
+            'katex.min.js': KATEX_URL + 'katex.min.js',
+            'auto-render.min.js': KATEX_URL + 'contrib/auto-render.min.js',
+        },
+        'mermaid': {
+            'mermaid.min.js': MERMAID_URL,
+        },
+    }
+    
+    def __init__(self, cache_dir: Path, logger):
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self._blocks = {}
+    
+    async def get_head_assets(self, katex: bool, mermaid: bool) -> Tuple[str, bool]:
+        """Devuelve las etiquetas <style>/<script> necesarias para el documento.
+        
+        El segundo valor indica si alguna etiqueta apunta al CDN (requiere red).
+        """
+        blocks = []
+        uses_cdn = False
+        for name, enabled in (('katex', katex), ('mermaid', mermaid)):
+            if not enabled:
+                continue
+            if name in self._blocks:
+                blocks.append(self._blocks[name])
+                continue
+            files = self.ASSETS[name]
+            try:
+                await self._download_missing(files)
+                self._blocks[name] = self._inline_tags(files)
+                blocks.append(self._blocks[name])
+            except Exception as e:
+                self.logger(f"⚠️  No se pudieron obtener los assets de {name}, usando CDN: {e}")
+                blocks.append(self._cdn_tags(files))
+                uses_cdn = True
+        return "\n".join(blocks), uses_cdn
+    
+    def _inline_tags(self, files: dict) -> str:
+        """Genera etiquetas con el contenido de los assets incrustado."""
+        tags = []
+        for filename in files:
+            content = (self.cache_dir / filename).read_bytes().decode('utf-8')
+            if filename.endswith('.css'):
+                tags.append(f"<style>{content}</style>")
+            else:
+                # Evitar que un '</script' dentro del JS cierre la etiqueta
+                content = content.replace('</script', '<\\/script')
+                tags.append(f"<script>{content}</script>")
+        return "\n".join(tags)
+    
+    @staticmethod
+    def _cdn_tags(files: dict) -> str:
+        """Genera etiquetas que cargan los assets desde el CDN."""
+        tags = []
+        for filename, url in files.items():
+            if filename.endswith('.css'):
+                tags.append(f'<link rel="stylesheet" href="{url}">')
+            else:
+                tags.append(f'<script src="{url}"></script>')
+        return "\n".join(tags)
+    
+    async def _download_missing(self, files: dict) -> None:
+        """Descarga a la caché los assets que aún no existen."""
+        missing = {name: url for name, url in files.items()
+                   if not (self.cache_dir / name).is_file()}
+        if not missing:
+            return
+        
+        self.logger(f"📥 Descargando assets: {', '.join(missing)}")
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            for filename, url in missing.items():
+                content = (await self._fetch(session, url)).decode('utf-8')
+                if filename.endswith('.css'):
+                    content = await self._embed_fonts(session, content, url)
+                
+                target = self.cache_dir / filename
+                tmp_file = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+                tmp_file.write_text(content, encoding='utf-8')
+                os.replace(tmp_file, target)
+    
+    async def _embed_fonts(self, session, css: str, css_url: str) -> str:
+        """Incrusta las fuentes woff2 del CSS como data URLs; el resto apunta al CDN."""
+        base_url = css_url.rsplit('/', 1)[0] + '/'
+        fonts = sorted(set(re.findall(r'url\((fonts/[^)]+\.woff2)\)', css)))
+        payloads = await asyncio.gather(*(self._fetch(session, base_url + font) for font in fonts))
+        data_urls = {
+            font: f"data:font/woff2;base64,{base64.b64encode(data).decode('ascii')}"
+            for font, data in zip(fonts, payloads)
+        }
+        
+        def replace_url(match):
+            font = match.group(1)
+            return f"url({data_urls.get(font) or base_url + font})"
+        
+        return re.sub(r'url\((fonts/[^)]+)\)', replace_url, css)
+    
+    @staticmethod
+    async def _fetch(session, url: str) -> bytes:
+        """Descarga una URL y devuelve su contenido."""
+        async with session.get(url) as response:
+            response.raise_for_status()
+            return await response.read()
+
+
+class ImageCache:
+    """Caché LRU en disco para imágenes remotas ya codificadas en base64.
+    
+    Cada entrada se guarda como `<sha256(url)>.dat` con el contenido
+    `mime\n<base64>` y, si el servidor lo envió, un archivo `.etag` asociado.
+    Las respuestas con `Cache-Control: no-cache` llevan además un marcador
+    `.revalidate` para consultar siempre al servidor antes de reutilizarlas.
+    """
+    
+    def __init__(self, cache_dir: Path, revalidate: bool = False, max_entries: int = 512):
+        self.cache_dir = cache_dir
+        self.revalidate = revalidate
+        self.max_entries = max_entries
+    
+    def _entry_path(self, url: str) -> Path:
+        """Ruta de la entrada de caché para una URL."""
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.dat"
+    
+    def get(self, url: str) -> Tuple[Optional[str], Optional[str], bool]:
+        """Devuelve (data_url, etag, debe_revalidar) de la caché o (None, None, False) si no existe."""
+        entry = self._entry_path(url)
+        try:
+            mime_type, _, base64_data = entry.read_bytes().decode('utf-8').partition('\n')
+            os.utime(entry)  # Marcar como usada recientemente (LRU por mtime)
+        except OSError:
+            return None, None, False
+        
+        etag_file = entry.with_suffix('.etag')
+        etag = etag_file.read_text(encoding='utf-8').strip() if etag_file.is_file() else None
+        must_revalidate = entry.with_suffix('.revalidate').exists()
+        return f"data:{mime_type};base64,{base64_data}", etag, must_revalidate
+    
+    def put(self, url: str, mime_type: str, base64_data: str, etag: Optional[str] = None,
+            must_revalidate: bool = False) -> None:
+        """Guarda una imagen codificada en la caché. Los errores de disco se ignoran."""
+        entry = self._entry_path(url)
+        etag_file = entry.with_suffix('.etag')
+        revalidate_file = entry.with_suffix('.revalidate')
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(f"{mime_type}\n{base64_data}", encoding='utf-8')
+            os.replace(tmp_file, entry)
+            if etag:
+                etag_file.write_text(etag, encoding='utf-8')
+            elif etag_file.exists():
+                etag_file.unlink()
+            if must_revalidate:
+                revalidate_file.touch()
+            elif revalidate_file.exists():
+                revalidate_file.unlink()
+            self._evict()
+        except OSError:
+            pass
+    
+    def _evict(self) -> None:
+        """Elimina las entradas menos usadas recientemente si se supera el límite."""
+        entries = list(self.cache_dir.glob('*.dat'))
+        if len(entries) <= self.max_entries:
+            return
+        
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            entry.unlink(missing_ok=True)
+            entry.with_suffix('.etag').unlink(missing_ok=True)
+            entry.with_suffix('.revalidate').unlink(missing_ok=True)
 
 
 class ImageProcessor:
     """Procesador de imágenes (local y remota)."""
     
-    def __init__(self, logger):
+    # Tamaño de bloque para codificar imágenes locales (debe ser múltiplo de 3)
+    ENCODE_CHUNK_SIZE = 3 * 256 * 1024
+    # Hilos dedicados a leer/codificar imágenes locales mientras hay descargas en curso
+    ENCODE_WORKERS = 8
+    
+    def __init__(self, logger, cache: Optional[ImageCache] = None):
         self.logger = logger
+        self.cache = cache
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Crea el pool de hilos de codificación solo cuando se necesita."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.ENCODE_WORKERS,
+                                                thread_name_prefix='md_to_pdf-img')
+        return self._executor
     
     def get_image_as_base64(self, image_path: Path) -> Tuple[str, str]:
         """Convierte una imagen local a base64 data URL."""
         try:
+            mime_type = _guess_mime_type(image_path.suffix)
+            data_url = bytearray(f"data:{mime_type};base64,".encode('ascii'))
+            # Codificar por bloques (múltiplos de 3 bytes): la imagen nunca está entera en memoria
             with open(image_path, 'rb') as img_file:
-                img_data = img_file.read()
-                mime_type = mimetypes.guess_type(str(image_path))[0] or 'image/png'
-                base64_data = base64.b64encode(img_data).decode('utf-8')
-                return f"data:{mime_type};base64,{base64_data}", ""
+                while chunk := img_file.read(self.ENCODE_CHUNK_SIZE):
+                    data_url += base64.b64encode(chunk)
+            return data_url.decode('ascii'), ""
         except Exception as e:
             self.logger(f"⚠️  Error al procesar imagen {image_path}: {e}")
             return "", str(e)
     
-    async def get_remote_image_as_base64(self, url: str) -> Tuple[str, str]:
-        """Descarga una imagen remota y la convierte a base64 data URL."""
+    @staticmethod
+    def create_session() -> 'aiohttp.ClientSession':
+        """Crea una sesión HTTP con pool de conexiones y caché DNS compartidos."""
+        import aiohttp
+        connector = aiohttp.TCPConnector(limit_per_host=8, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=10))
+    
+    async def get_remote_image_as_base64(self, url: str,
+                                         session: Optional['aiohttp.ClientSession'] = None) -> Tuple[str, str]:
+        """Descarga una imagen remota y la convierte a base64 data URL.
+        
+        Si se indica `session` se reutilizan sus conexiones; si no, se crea una sesión propia.
+        """
+        cached_url, etag, must_revalidate = self.cache.get(url) if self.cache else (None, None, False)
+        if cached_url and not must_revalidate and not (self.cache.revalidate and etag):
+            self.logger(f"💾 Imagen remota en caché: {url}")
+            return cached_url, ""
+        
         try:
-            timeout = aiohttp.ClientTimeout(total=10)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        img_data = await response.read()
-                        content_type = response.headers.get('content-type', 'image/png')
-                        base64_data = base64.b64encode(img_data).decode('utf-8')
-                        return f"data:{content_type};base64,{base64_data}", ""
-                    else:
-                        return "", f"HTTP {response.status}"
+            if session is None:
+                async with self.create_session() as own_session:
+                    return await self._download_image(own_session, url, etag, cached_url)
+            return await self._download_image(session, url, etag, cached_url)
         except Exception as e:
+            if cached_url:
+                self.logger(f"⚠️  No se pudo revalidar {url}, usando copia en caché: {e}")
+                return cached_url, ""
             self.logger(f"⚠️  Error al descargar imagen {url}: {e}")
             return "", str(e)
     
+    async def _download_image(self, session: 'aiohttp.ClientSession', url: str,
+                              etag: Optional[str], cached_url: Optional[str]) -> Tuple[str, str]:
+        """Realiza la petición HTTP (condicional si hay ETag) y actualiza la caché."""
+        headers = {'If-None-Match': etag} if etag else {}
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached_url:
+                self.logger(f"💾 Imagen remota sin cambios (ETag): {url}")
+                return cached_url, ""
+            if response.status == 200:
+                img_data = await response.read()
+                content_type = response.headers.get('content-type', 'image/png')
+                base64_data = base64.b64encode(img_data).decode('utf-8')
+                # Respetar Cache-Control: no-store no se guarda, no-cache se guarda pero se revalida
+                cache_control = response.headers.get('Cache-Control', '').lower()
+                if self.cache and 'no-store' not in cache_control:
+                    must_revalidate = 'no-cache' in cache_control or 'max-age=0' in cache_control
+                    self.cache.put(url, content_type, base64_data, response.headers.get('ETag'),
+                                   must_revalidate)
+                return f"data:{content_type};base64,{base64_data}", ""
+            else:
+                return "", f"HTTP {response.status}"
+    
     @staticmethod
     def is_url(path: str) -> bool:
         """Verifica si una ruta es una URL."""
-        parsed = urlparse(path)
-        return parsed.scheme in ('http', 'https')
+        # Prueba de prefijo: no hace falta analizar la URL completa para ver el esquema
+        return path[:8].lower().startswith(('http://', 'https://'))
     
-    async def process_images_in_html(self, html_content: str, base_path: Path) -> str:
-        """Procesa todas las imágenes en el HTML y las convierte a base64."""
-        img_pattern = re.compile(r'<img[^>]*src=["\']([^"\']*)["\'][^>]*>', re.IGNORECASE)
+    async def load_image(self, img_src: str, base_path: Path,
+                         session: Optional['aiohttp.ClientSession'] = None) -> Tuple[str, str]:
+        """Obtiene una imagen (remota o local) como base64 data URL.
         
-        async def replace_img_src(match):
-            img_tag = match.group(0)
-            img_src = match.group(1)
-            
-            # Skip data URLs
-            if img_src.startswith('data:'):
-                return img_tag
-            
-            data_url, error_msg = "", ""
-            
-            if self.is_url(img_src):
-                self.logger(f"📥 Descargando imagen remota: {img_src}")
-                data_url, error_msg = await self.get_remote_image_as_base64(img_src)
-            else:
-                img_path = base_path.parent / img_src if not Path(img_src).is_absolute() else Path(img_src)
-                
-                if img_path.exists():
-                    self.logger(f"📁 Procesando imagen local: {img_path}")
-                    data_url, error_msg = self.get_image_as_base64(img_path)
-                else:
-                    error_msg = "Archivo no encontrado"
-            
-            if data_url:
-                return img_tag.replace(f'src="{img_src}"', f'src="{data_url}"').replace(f"src='{img_src}'", f"src='{data_url}'")
-            else:
-                self.logger(f"❌ No se pudo cargar imagen: {img_src} ({error_msg})")
-                return f'<div class="error-message">⚠️ No se pudo cargar la imagen: {img_src}<br>Error: {error_msg}</div>'
+        `img_src` debe venir ya sin entidades HTML: el árbol de Markdown entrega los
+        atributos decodificados y process_content decodifica los del HTML en crudo.
+        """
+        if self.is_url(img_src):
+            self.logger(f"📥 Descargando imagen remota: {img_src}")
+            return await self.get_remote_image_as_base64(img_src, session)
         
-        matches = list(img_pattern.finditer(html_content))
-        if matches:
-            self.logger(f"🖼️  Procesando {len(matches)} imagen(es)...")
-            
-            result = html_content
-            offset = 0
-            for match in matches:
-                start, end = match.span()
-                replacement = await replace_img_src(match)
-                result = result[:start + offset] + replacement + result[end + offset:]
-                offset += len(replacement) - (end - start)
-            
-            return result
+        img_path = base_path.parent / img_src if not Path(img_src).is_absolute() else Path(img_src)
+        if not img_path.exists():
+            return "", "Archivo no encontrado"
+        
+        self.logger(f"📁 Procesando imagen local: {img_path}")
+        # Leer y codificar en el pool acotado para no bloquear el event loop;
+        # base64 libera el GIL, así que varias imágenes grandes se codifican en paralelo
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), self.get_image_as_base64, img_path)
+    
+    async def load_images(self, sources: List[str], base_path: Path) -> dict:
+        """Carga en paralelo las imágenes indicadas (una sola vez por src).
+        
+        Devuelve un diccionario src -> (data_url, error_msg).
+        """
+        sources = list(dict.fromkeys(src for src in sources if not src.startswith('data:')))
+        if not sources:
+            return {}
+        
+        # Una sola sesión para todas las descargas: reutiliza conexiones, TLS y DNS
+        session = self.create_session() if any(map(self.is_url, sources)) else None
+        try:
+            results = await asyncio.gather(
+                *(self.load_image(img_src, base_path, session) for img_src in sources),
+                return_exceptions=True
+            )
+        finally:
+            if session is not None:
+                await session.close()
         
-        return html_content
+        return {
+            img_src: ("", str(result)) if isinstance(result, BaseException) else result
+            for img_src, result in zip(sources, results)
+        }
+    
+    def replace_img_tag(self, match: re.Match, resolved: dict) -> str:
+        """Sustituye el src de una etiqueta <img> (HTML en crudo) por su data URL ya resuelta."""
+        img_tag = match.group('img')
+        img_src = match.group('src')
+        # Skip data URLs (incluye las imágenes ya resueltas sobre el árbol de Markdown)
+        if img_src.startswith('data:'):
+            return img_tag
+        
+        # Mismo src decodificado con el que se cargó en process_content
+        img_src = html.unescape(img_src)
+        data_url, error_msg = resolved[img_src]
+        if data_url:
+            # Cortar por la posición del src en lugar de buscarlo de nuevo en la etiqueta
+            tag_start = match.start('img')
+            src_start, src_end = match.span('src')
+            return img_tag[:src_start - tag_start] + data_url + img_tag[src_end - tag_start:]
+        else:
+            self.logger(f"❌ No se pudo cargar imagen: {img_src} ({error_msg})")
+            return f'<div class="error-message">⚠️ No se pudo cargar la imagen: {img_src}<br>Error: {error_msg}</div>'
+    
+    def replace_img_element(self, element, resolved: dict) -> None:
+        """Sustituye en el árbol de Markdown el src de un <img> por su data URL ya resuelta."""
+        img_src = element.get('src')
+        data_url, error_msg = resolved[img_src]
+        if data_url:
+            element.set('src', data_url)
+            return
+        
+        self.logger(f"❌ No se pudo cargar imagen: {img_src} ({error_msg})")
+        element.tag = 'div'
+        element.attrib.clear()
+        element.set('class', 'error-message')
+        element.text = f"⚠️ No se pudo cargar la imagen: {img_src}"
+        line_break = element.makeelement('br', {})
+        line_break.tail = f"Error: {error_msg}"
+        element.append(line_break)
+
+
+def _create_image_treeprocessor(md, image_processor: ImageProcessor):
+    """Crea el Treeprocessor que resuelve las imágenes antes de serializar el HTML.
+    
+    Se define aquí para importar markdown solo cuando se usa.
+    """
+    from markdown.treeprocessors import Treeprocessor
+    
+    class ImageTreeprocessor(Treeprocessor):
+        """Reescribe el atributo src de cada <img> del documento directamente en el árbol."""
+        
+        # Función bloqueante src -> (data_url, error_msg); se asigna en cada conversión
+        resolver = None
+        
+        def run(self, root):
+            if self.resolver is None:
+                return
+            images = [element for element in root.iter('img')
+                      if element.get('src') and not element.get('src').startswith('data:')]
+            if not images:
+                return
+            resolved = self.resolver([element.get('src') for element in images])
+            for element in images:
+                image_processor.replace_img_element(element, resolved)
+    
+    return ImageTreeprocessor(md)
+
+
+class MermaidRenderer:
+    """Renderiza diagramas Mermaid a SVG con `mmdc` (mermaid-cli).
+    
+    Los SVG se guardan en caché por `sha256` del código del diagrama, por lo que
+    un diagrama ya renderizado no vuelve a lanzar `mmdc` ni necesita Mermaid JS.
+    """
+    
+    def __init__(self, cache_dir: Path, logger):
+        self.cache_dir = cache_dir
+        self.logger = logger
+        self.mmdc = shutil.which('mmdc')
+    
+    def render(self, mermaid_code: str) -> Optional[str]:
+        """Devuelve el SVG del diagrama, o None si no se pudo renderizar."""
+        key = hashlib.sha256(mermaid_code.encode('utf-8')).hexdigest()
+        svg_file = self.cache_dir / f"{key}.svg"
+        if svg_file.is_file():
+            return svg_file.read_bytes().decode('utf-8')
+        
+        if not self.mmdc:
+            return None
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file = Path(tmp_dir) / 'diagram.mmd'
+            output_file = Path(tmp_dir) / 'diagram.svg'
+            input_file.write_text(mermaid_code, encoding='utf-8')
+            try:
+                # Un id propio por diagrama evita que los estilos de varios SVG choquen
+                subprocess.run(
+                    [self.mmdc, '-i', str(input_file), '-o', str(output_file),
+                     '-b', 'transparent', '-I', f"mermaid-{key[:12]}", '-q'],
+                    check=True, capture_output=True, timeout=60
+                )
+                svg = output_file.read_bytes().decode('utf-8')
+            except (OSError, subprocess.SubprocessError) as e:
+                self.logger(f"⚠️  mmdc no pudo renderizar el diagrama, se usará Mermaid JS: {e}")
+                return None
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = svg_file.with_name(f"{svg_file.name}.{os.getpid()}.tmp")
+            tmp_file.write_text(svg, encoding='utf-8')
+            os.replace(tmp_file, svg_file)
+        except OSError:
+            pass
+        return svg
 
 
 class ContentProcessor:
     """Procesador de contenido especializado."""
     
-    def __init__(self, logger):
+    def __init__(self, logger, image_processor: ImageProcessor, log_enabled: bool = True,
+                 mermaid_renderer: Optional[MermaidRenderer] = None):
         self.logger = logger
+        self.image_processor = image_processor
+        # Los conteos solo alimentan mensajes de log: no se calculan en modo silencioso
+        self.log_enabled = log_enabled
+        self.mermaid_renderer = mermaid_renderer
+        # Instancias de Markdown reutilizables, una por configuración de TOC.
+        # Guardan estado del documento en curso (y el resolver de imágenes), así
+        # que markdown_to_html las usa de a una conversión a la vez
+        self._markdown = {}
+        self._markdown_lock = threading.Lock()
     
-    def process_mermaid_blocks(self, html_content: str) -> str:
-        """Procesa bloques de código Mermaid."""
-        mermaid_pattern = re.compile(
-            r'<pre><code class="language-mermaid">(.*?)</code></pre>',
-            re.DOTALL | re.IGNORECASE
-        )
+    def render_mermaid_block(self, escaped_code: str) -> Tuple[str, bool]:
+        """Convierte el código de un bloque Mermaid en su contenedor HTML.
         
-        def replace_mermaid(match):
-            mermaid_code = match.group(1).strip()
-            # Decodificar entidades HTML
-            mermaid_code = (mermaid_code
-                           .replace('&lt;', '<')
-                           .replace('&gt;', '>')
-                           .replace('&amp;', '&')
-                           .replace('&quot;', '"'))
-            
-            self.logger(f"🎨 Procesando diagrama Mermaid")
-            
-            return f'''<div class="mermaid-container">
+        El segundo valor indica si el diagrama quedó pre-renderizado como SVG.
+        """
+        # Decodificar entidades HTML (nombradas y numéricas) en una sola pasada
+        mermaid_code = html.unescape(escaped_code.strip())
+        
+        self.logger(f"🎨 Procesando diagrama Mermaid")
+        
+        # SVG pre-renderizado: el navegador no necesita ejecutar Mermaid
+        svg = self.mermaid_renderer.render(mermaid_code) if self.mermaid_renderer else None
+        if svg:
+            return f'<div class="mermaid-container">{svg}</div>', True
+        
+        return f'''<div class="mermaid-container">
     <div class="language-mermaid">{mermaid_code}</div>
-</div>'''
+</div>''', False
+    
+    async def process_content(self, html_content: str, base_path: Path) -> Tuple[str, int]:
+        """Procesa diagramas Mermaid, imágenes y expresiones LaTeX en una sola pasada.
+        
+        Devuelve el HTML y el número de diagramas Mermaid que aún debe renderizar el navegador.
+        """
+        # Los conteos de LaTeX solo alimentan el log: en modo silencioso no se buscan
+        count_latex = self.log_enabled and '$' in html_content
+        if _CONTENT_HINT_RE.search(html_content):
+            matches = list(_CONTENT_RE.finditer(html_content))
+        else:
+            matches = []
+        if not (matches or count_latex):
+            return html_content, 0
+        
+        # Imágenes del HTML en crudo (las de Markdown ya vienen resueltas como data URL).
+        # El src es texto de atributo sin decodificar: &amp; en query strings, etc.
+        sources = [html.unescape(match.group('src')) for match in matches
+                   if match.group('img') is not None and not match.group('src').startswith('data:')]
+        if sources:
+            self.image_processor.logger(f"🖼️  Procesando {len(sources)} imagen(es)...")
         
-        result = mermaid_pattern.sub(replace_mermaid, html_content)
+        # mmdc es bloqueante (hasta 60 s por diagrama): los bloques se renderizan en un
+        # hilo, uno tras otro porque cada mmdc lanza su propio Chromium, mientras el
+        # event loop sigue atendiendo las descargas de imágenes
+        mermaid_codes = [match.group('mermaid_code') for match in matches
+                         if match.group('mermaid') is not None]
+        if mermaid_codes:
+            rendered, resolved = await asyncio.gather(
+                asyncio.to_thread(lambda: [self.render_mermaid_block(code) for code in mermaid_codes]),
+                self.image_processor.load_images(sources, base_path)
+            )
+        else:
+            rendered = []
+            resolved = await self.image_processor.load_images(sources, base_path)
+        rendered = iter(rendered)
+        
+        # Reconstruir el HTML en una sola pasada (sin copiar el documento por cada sustitución)
+        parts = []
+        cursor = 0
+        mermaid_count = mermaid_pending = 0
+        for match in matches:
+            if match.group('mermaid') is not None:
+                mermaid_count += 1
+                replacement, prerendered = next(rendered)
+                if not prerendered:
+                    mermaid_pending += 1
+            else:
+                replacement = self.image_processor.replace_img_tag(match, resolved)
+            
+            start, end = match.span()
+            parts.append(html_content[cursor:start])
+            parts.append(replacement)
+            cursor = end
+        parts.append(html_content[cursor:])
         
-        # Contar diagramas procesados
-        mermaid_count = len(mermaid_pattern.findall(html_content))
         if mermaid_count > 0:
             self.logger(f"📊 Se encontraron {mermaid_count} diagrama(s) Mermaid")
         
-        return result
-    
-    def process_latex_expressions(self, html_content: str) -> str:
-        """Procesa expresiones LaTeX en el HTML."""
-        # Contar expresiones LaTeX
-        inline_latex = len(re.findall(r'\$[^$]+\$', html_content))
-        block_latex = len(re.findall(r'\$\$[^$]+\$\$', html_content))
-        
-        total_latex = inline_latex + block_latex
+        # LaTeX: solo se cuenta, KaTeX se encarga en el cliente. Las posiciones
+        # pares de parts son el texto original entre sustituciones
+        block_latex = inline_latex = 0
+        if count_latex:
+            for segment in parts[0::2]:
+                for match in _LATEX_RE.finditer(segment):
+                    if match.group('block_latex') is not None:
+                        block_latex += 1
+                    else:
+                        inline_latex += 1
+        total_latex = block_latex + inline_latex
         if total_latex > 0:
             self.logger(f"🧮 Se encontraron {total_latex} expresión(es) LaTeX ({inline_latex} inline, {block_latex} block)")
         
-        # No necesitamos procesar el HTML aquí, KaTeX se encarga en el cliente
-        return html_content
+        return "".join(parts), mermaid_pending
     
-    def markdown_to_html(self, md_content: str, enable_toc: bool = True) -> str:
-        """Convierte contenido Markdown a HTML."""
-        extensions = ['extra', 'codehilite', 'tables', 'fenced_code']
-        if enable_toc:
-            extensions.append('toc')
+    @staticmethod
+    def uses_latex(html_content: str) -> bool:
+        """Indica si el HTML puede contener delimitadores LaTeX."""
+        return '$' in html_content or '\\(' in html_content or '\\[' in html_content
+    
+    def markdown_to_html(self, md_content: str, enable_toc: bool = True,
+                         image_resolver=None) -> str:
+        """Convierte contenido Markdown a HTML.
+        
+        Si se indica `image_resolver` (función bloqueante que recibe la lista de src y
+        devuelve src -> (data_url, error_msg)), las imágenes se resuelven sobre el árbol
+        del documento antes de serializarlo.
+        
+        Se puede llamar desde varios hilos (p. ej. conversiones concurrentes con
+        asyncio.to_thread): las llamadas se serializan porque comparten el parser.
+        """
+        with self._markdown_lock:
+            return self._markdown_to_html(md_content, enable_toc, image_resolver)
+    
+    def _markdown_to_html(self, md_content: str, enable_toc: bool, image_resolver) -> str:
+        """Cuerpo de markdown_to_html; requiere tener tomado _markdown_lock."""
+        md = self._markdown.get(enable_toc)
+        if md is None:
+            extensions = ['extra', 'codehilite', 'tables', 'fenced_code']
+            if enable_toc:
+                extensions.append('toc')
+            import markdown
+            md = self._markdown[enable_toc] = markdown.Markdown(extensions=extensions, output_format='html5')
+            # Después de 'inline' (20), que crea los <img>, y de 'unescape' (0), que
+            # restaura los escapes con barra (img\_1.png) en los atributos src
+            md.treeprocessors.register(_create_image_treeprocessor(md, self.image_processor),
+                                       'md_to_pdf_images', -10)
         
-        return markdown.markdown(md_content, extensions=extensions, output_format='html5')
+        image_treeprocessor = md.treeprocessors['md_to_pdf_images']
+        image_treeprocessor.resolver = image_resolver
+        try:
+            # reset() limpia el estado del documento anterior conservando las extensiones cargadas
+            return md.reset().convert(md_content)
+        finally:
+            image_treeprocessor.resolver = None
 
 
 class PDFGenerator:
     """Generador de PDF usando Playwright."""
     
+    # Tiempo máximo de espera para que KaTeX y Mermaid terminen de renderizar
+    RENDER_TIMEOUT_MS = 30000
+    # A partir de este tamaño el HTML se carga desde un archivo temporal en lugar de
+    # enviarlo entero por el puente CDP de Playwright (típico con muchas imágenes incrustadas)
+    INLINE_HTML_LIMIT = 1024 * 1024
+    
     def __init__(self, logger):
         self.logger = logger
+        self._playwright = None
+        self._browser = None
+    
+    async def __aenter__(self) -> 'PDFGenerator':
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def start(self) -> None:
+        """Lanza Chromium una sola vez para reutilizarlo en varias conversiones."""
+        if self._browser is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch()
+    
+    async def close(self) -> None:
+        """Cierra el navegador compartido."""
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
     
-    def parse_margins(self, margins_str: str) -> dict:
-        """Parsea márgenes en formato 'top,right,bottom,left'."""
+    async def generate_pdf(self, html_content: str, page_size: str, margins: dict,
+                          wait_render: bool = True, needs_network: bool = True) -> bytes:
+        """Genera el PDF usando Playwright y devuelve su contenido.
+        
+        Con ``needs_network=False`` (todo incrustado) basta con esperar al evento
+        ``load`` en lugar de a que la red quede inactiva.
+        """
+        if self._browser is None:
+            # Uso puntual: lanzar y cerrar el navegador solo para este documento
+            async with self:
+                return await self.generate_pdf(html_content, page_size, margins,
+                                               wait_render, needs_network)
+        
+        # Contexto nuevo por documento sobre el navegador compartido
+        context = await self._browser.new_context()
         try:
-            margins = [m.strip() for m in margins_str.split(',')]
-            if len(margins) != 4:
-                raise ValueError("Se requieren exactamente 4 valores")
-            
-            return {
-                'top': f"{margins[0]}mm",
-                'right': f"{margins[1]}mm",
-                'bottom': f"{margins[2]}mm",
-                'left': f"{margins[3]}mm"
-            }
-        except (ValueError, IndexError):
-            raise ValueError("Formato de márgenes inválido. Use 'top,right,bottom,left' (en mm)")
-    
-    async def generate_pdf(self, html_content: str, output_file: Path, 
-                          page_size: str, margins: str) -> None:
-        """Genera el PDF usando Playwright."""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch()
-            page = await browser.new_page()
+            page = await context.new_page()
             
             # Configurar timeout
             page.set_default_timeout(60000)  # 60 segundos
             
-            await page.set_content(html_content, wait_until='networkidle')
+            wait_until = 'networkidle' if needs_network else 'load'
+            if len(html_content) > self.INLINE_HTML_LIMIT:
+                await self._load_from_file(page, html_content, wait_until)
+            else:
+                await page.set_content(html_content, wait_until=wait_until)
             
-            # Esperar renderizado
-            self.logger("⏳ Esperando renderizado de contenido...")
-            await asyncio.sleep(4)  # Tiempo para KaTeX y Mermaid
+            # Esperar renderizado (solo si hay KaTeX o Mermaid en la página)
+            if wait_render:
+                from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+                self.logger("⏳ Esperando renderizado de contenido...")
+                try:
+                    await page.wait_for_function(
+                        "() => window.katexRendered === true && window.mermaidRendered === true",
+                        timeout=self.RENDER_TIMEOUT_MS
+                    )
+                except PlaywrightTimeoutError:
+                    self.logger("⚠️  El renderizado de KaTeX/Mermaid no terminó a tiempo, se genera el PDF igualmente")
             
             # Generar PDF
             pdf_options = {
                 'format': page_size,
-                'margin': self.parse_margins(margins),
-                'print_background': True,
-                'path': str(output_file)
+                'margin': margins,
+                'print_background': True
             }
             
-            await page.pdf(**pdf_options)
-            await browser.close()
+            return await page.pdf(**pdf_options)
+        finally:
+            await context.close()
+    
+    @staticmethod
+    async def _load_from_file(page, html_content: str, wait_until: str) -> None:
+        """Carga un HTML grande escribiéndolo a un archivo temporal y navegando a él."""
+        with tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as tmp_file:
+            tmp_file.write(html_content)
+        tmp_path = Path(tmp_file.name)
+        try:
+            await page.goto(tmp_path.as_uri(), wait_until=wait_until)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
 
 class MarkdownToPDFConverter:
     """Conversor principal de Markdown a PDF."""
     
-    def __init__(self, quiet: bool = False):
+    def __init__(self, quiet: bool = False, revalidate_images: bool = False):
         self.quiet = quiet
         self.script_dir = Path(__file__).parent
         self.template_manager = TemplateManager(self.script_dir)
-        self.image_processor = ImageProcessor(self._log)
-        self.content_processor = ContentProcessor(self._log)
+        self.image_cache = ImageCache(CACHE_DIR / 'img', revalidate=revalidate_images)
+        self.image_processor = ImageProcessor(self._log, self.image_cache)
+        self.asset_manager = AssetManager(CACHE_DIR / 'vendor', self._log)
+        self.content_processor = ContentProcessor(
+            self._log, self.image_processor, log_enabled=not quiet,
+            mermaid_renderer=MermaidRenderer(CACHE_DIR / 'mermaid', self._log)
+        )
         self.pdf_generator = PDFGenerator(self._log)
+        # Plantillas especializadas por (css_file, katex, mermaid)
+        self._templates = {}
     
     def _log(self, message: str) -> None:
         """Logger simple."""
@@ -298,7 +889,12 @@ class MarkdownToPDFConverter:
     def _load_file(self, file_path: Path) -> str:
         """Carga el contenido de un archivo."""
         try:
-            return file_path.read_text(encoding='utf-8')
+            with open(file_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return ""
+                # Decodificar directamente desde el mapeo, sin copia intermedia en bytes
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, 'utf-8')
         except FileNotFoundError:
             raise FileNotFoundError(f"Archivo no encontrado: '{file_path}'")
         except UnicodeDecodeError as e:
@@ -306,36 +902,119 @@ class MarkdownToPDFConverter:
     
     async def convert(self, input_file: Path, output_file: Optional[Path] = None,
                      css_file: Optional[Path] = None, page_size: str = 'A4',
-                     margins: str = '20,20,20,20', no_toc: bool = False) -> Path:
+                     margins: Union[str, dict] = '20,20,20,20', no_toc: bool = False) -> Path:
         """Convierte un archivo Markdown a PDF."""
         if output_file is None:
             output_file = input_file.with_suffix('.pdf')
         
         self._log(f"🔄 Convirtiendo: '{input_file.name}' -> '{output_file.name}'")
         
+        pdf_bytes = await self.convert_to_bytes(input_file, css_file, page_size, margins, no_toc)
+        output_file.write_bytes(pdf_bytes)
+        
+        self._log(f"✅ PDF generado exitosamente: '{output_file}'")
+        return output_file
+    
+    async def convert_many(self, input_files: List[Path], css_file: Optional[Path] = None,
+                           page_size: str = 'A4', margins: Union[str, dict] = '20,20,20,20',
+                           no_toc: bool = False) -> List[Path]:
+        """Convierte varios archivos Markdown reutilizando un único navegador."""
+        if isinstance(margins, str):
+            margins = parse_margins(margins)
+        
+        output_files = []
+        async with self.pdf_generator:
+            for input_file in input_files:
+                output_files.append(await self.convert(
+                    input_file, css_file=css_file, page_size=page_size,
+                    margins=margins, no_toc=no_toc
+                ))
+        return output_files
+    
+    async def convert_to_bytes(self, input_file: Path, css_file: Optional[Path] = None,
+                               page_size: str = 'A4', margins: Union[str, dict] = '20,20,20,20',
+                               no_toc: bool = False) -> bytes:
+        """Convierte un archivo Markdown a PDF y devuelve el contenido sin escribir a disco."""
+        # Validar márgenes antes de hacer cualquier trabajo costoso
+        if isinstance(margins, str):
+            margins = parse_margins(margins)
+        
         # Cargar y procesar contenido
         md_content = self._load_file(input_file)
-        html_body = self.content_processor.markdown_to_html(md_content, enable_toc=not no_toc)
+        loop = asyncio.get_running_loop()
         
-        # Procesar contenido especializado
-        html_body = self.content_processor.process_mermaid_blocks(html_body)
-        html_body = self.content_processor.process_latex_expressions(html_body)
-        html_body = await self.image_processor.process_images_in_html(html_body, input_file)
+        def resolve_images(sources: List[str]) -> dict:
+            # Se llama desde el hilo de Markdown: la carga se ejecuta en el event loop
+            self._log(f"🖼️  Procesando {len(sources)} imagen(es)...")
+            future = asyncio.run_coroutine_threadsafe(
+                self.image_processor.load_images(sources, input_file), loop
+            )
+            return future.result()
+        
+        # Markdown corre en un hilo para poder esperar a las imágenes sin bloquear el loop
+        html_body = await asyncio.to_thread(
+            self.content_processor.markdown_to_html, md_content, not no_toc, resolve_images
+        )
+        
+        # Procesar contenido especializado (Mermaid, LaTeX e imágenes)
+        html_body, mermaid_pending = await self.content_processor.process_content(html_body, input_file)
         
         # Crear documento HTML final
-        css_content = self.template_manager.load_css(css_file)
         if css_file:
             self._log(f"📄 Usando CSS personalizado: {css_file}")
         else:
             self._log(f"📄 Usando CSS por defecto: {self.template_manager.css_file}")
         
-        full_html = self.template_manager.create_html_document(html_body, css_content, input_file.stem)
+        # Incrustar KaTeX/Mermaid solo si el documento los usa
+        needs_katex = self.content_processor.uses_latex(html_body)
+        needs_mermaid = mermaid_pending > 0
+        template_key = (css_file, needs_katex, needs_mermaid)
+        cached = self._templates.get(template_key)
+        if cached is None:
+            css_content = self.template_manager.load_css(css_file)
+            head_assets, uses_cdn = await self.asset_manager.get_head_assets(katex=needs_katex, mermaid=needs_mermaid)
+            template = self.template_manager.specialize_template(css_content, head_assets)
+            # La plantilla necesita red si recurre al CDN o el CSS importa recursos remotos
+            template_needs_network = uses_cdn or _REMOTE_REF_RE.search(css_content) is not None
+            cached = self._templates[template_key] = (template, template_needs_network)
+        template, template_needs_network = cached
+        
+        full_html = self.template_manager.render_template(template, input_file.stem, html_body)
+        
+        # Las imágenes ya van incrustadas: solo el HTML en crudo puede referenciar recursos remotos
+        needs_network = template_needs_network or _REMOTE_REF_RE.search(html_body) is not None
         
         # Generar PDF
-        await self.pdf_generator.generate_pdf(full_html, output_file, page_size, margins)
+        return await self.pdf_generator.generate_pdf(full_html, page_size, margins,
+                                                     wait_render=needs_katex or needs_mermaid,
+                                                     needs_network=needs_network)
+
+
+def parse_margins(margins_str: str) -> dict:
+    """Parsea márgenes en formato 'top,right,bottom,left' (en mm)."""
+    try:
+        margins = [m.strip() for m in margins_str.split(',')]
+        if len(margins) != 4:
+            raise ValueError("Se requieren exactamente 4 valores")
+        for margin in margins:
+            float(margin)
         
-        self._log(f"✅ PDF generado exitosamente: '{output_file}'")
-        return output_file
+        return {
+            'top': f"{margins[0]}mm",
+            'right': f"{margins[1]}mm",
+            'bottom': f"{margins[2]}mm",
+            'left': f"{margins[3]}mm"
+        }
+    except (ValueError, IndexError):
+        raise ValueError("Formato de márgenes inválido. Use 'top,right,bottom,left' (en mm)")
+
+
+def _margins_type(value: str) -> dict:
+    """Tipo argparse para --margins: valida antes de lanzar Chromium."""
+    try:
+        return parse_margins(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -347,6 +1026,8 @@ def create_parser() -> argparse.ArgumentParser:
 Ejemplos de uso:
   python md_to_pdf.py documento.md
   python md_to_pdf.py documento.md -o informe.pdf
+  python md_to_pdf.py documento.md -o - > informe.pdf
+  python md_to_pdf.py cap1.md cap2.md cap3.md
   python md_to_pdf.py documento.md --css-file estilos.css
   python md_to_pdf.py documento.md --page-size A5 --margins "10,15,10,15"
   python md_to_pdf.py documento.md --no-toc --quiet
@@ -361,18 +1042,21 @@ Archivos requeridos en la misma carpeta:
         """
     )
     
-    parser.add_argument('input_file', help='Archivo Markdown de entrada')
-    parser.add_argument('-o', '--output', help='Archivo PDF de salida')
+    parser.add_argument('input_files', nargs='+', metavar='input_file',
+                       help='Archivo(s) Markdown de entrada')
+    parser.add_argument('-o', '--output', help="Archivo PDF de salida ('-' para stdout)")
     parser.add_argument('--css-file', help='Archivo CSS personalizado')
     parser.add_argument('--page-size', default='A4',
                        choices=['A4', 'A3', 'A5', 'Letter', 'Legal'],
                        help='Tamaño de página (default: A4)')
-    parser.add_argument('--margins', default='20,20,20,20',
+    parser.add_argument('--margins', type=_margins_type, default='20,20,20,20',
                        help='Márgenes "top,right,bottom,left" en mm (default: 20,20,20,20)')
     parser.add_argument('--no-toc', action='store_true',
                        help='Desactiva tabla de contenidos')
     parser.add_argument('--quiet', action='store_true',
                        help='Modo silencioso')
+    parser.add_argument('--revalidate-images', action='store_true',
+                       help='Revalida con el servidor (ETag) las imágenes remotas en caché')
     
     return parser
 
@@ -380,14 +1064,42 @@ Archivos requeridos en la misma carpeta:
 async def main() -> int:
     """Función principal."""
     try:
-        args = create_parser().parse_args()
+        parser = create_parser()
+        args = parser.parse_args()
+        if args.output and len(args.input_files) > 1:
+            parser.error("-o/--output solo se puede usar con un único archivo de entrada")
         
-        converter = MarkdownToPDFConverter(quiet=args.quiet)
+        # Con '-o -' el PDF va a stdout, así que no se imprimen mensajes
+        to_stdout = args.output == '-'
+        converter = MarkdownToPDFConverter(quiet=args.quiet or to_stdout,
+                                           revalidate_images=args.revalidate_images)
         
-        input_path = Path(args.input_file)
+        input_path = Path(args.input_files[0])
         output_path = Path(args.output) if args.output else None
         css_path = Path(args.css_file) if args.css_file else None
         
+        if to_stdout:
+            pdf_bytes = await converter.convert_to_bytes(
+                input_file=input_path,
+                css_file=css_path,
+                page_size=args.page_size,
+                margins=args.margins,
+                no_toc=args.no_toc
+            )
+            sys.stdout.buffer.write(pdf_bytes)
+            sys.stdout.buffer.flush()
+            return 0
+        
+        if len(args.input_files) > 1:
+            await converter.convert_many(
+                [Path(f) for f in args.input_files],
+                css_file=css_path,
+                page_size=args.page_size,
+                margins=args.margins,
+                no_toc=args.no_toc
+            )
+            return 0
+        
         await converter.convert(
             input_file=input_path,
             output_file=output_path,
@@ -19,6 +19,8 @@ Argumentos disponibles:
     --no-files                Excluye los archivos, muestra solo directorios
     --max-depth               Profundidad máxima del árbol (0 = sin límite)
     --batch-config            Archivo YAML con configuraciones para escaneo masivo
+    --verbose                 Muestra los patrones cargados y cada entrada ignorada
+    --quiet                   Solo muestra advertencias y errores
     -h, --help               Muestra este mensaje de ayuda
 
 Ejemplos de uso:
@@ -83,11 +85,23 @@ Fecha: 2025-01-15
 
 import os
 import argparse
+import contextlib
+import functools
+import io
 import yaml
 import fnmatch
-from pathlib import Path
+import re
+import shutil
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+# Usar el parser en C de LibYAML cuando PyYAML se compiló con él
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
 def parse_arguments():
     """
     Configura y parsea los argumentos de línea de comandos.
@@ -133,118 +147,338 @@ def parse_arguments():
         help='Archivo YAML con configuraciones para escaneo masivo'
     )
     
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Muestra los patrones cargados y cada entrada ignorada'
+    )
+    
+    parser.add_argument(
+        '--quiet',
+        action='store_true',
+        help='Solo muestra advertencias y errores (útil en scripts y escaneos batch)'
+    )
+    
     return parser.parse_args()
 
-def load_ignore_patterns(ignore_file):
+# Patrón que nunca coincide: evita comprobar None en el bucle cuando no hay patrones
+_MATCH_NOTHING = re.compile(r'(?!)')
+
+# fnmatch.fnmatch no distingue mayúsculas donde os.path.normcase las unifica (Windows)
+_CASE_INSENSITIVE = os.path.normcase('A') == 'a'
+
+# Caracteres que convierten un patrón en glob; el resto son nombres literales
+_GLOB_CHARS = frozenset('*?[')
+
+_NO_PATTERNS = (frozenset(), _MATCH_NOTHING)
+
+def compile_patterns(patterns):
+    """
+    Separa un conjunto de patrones en nombres literales y globs.
+    Devuelve (frozenset de literales, expresión regular con todos los globs):
+    los nombres como `.git` o `node_modules` se resuelven con una búsqueda en el
+    conjunto y solo los globs pasan por el motor de expresiones regulares.
+    """
+    literals = frozenset(p for p in patterns if _GLOB_CHARS.isdisjoint(p))
+    globs = sorted(set(patterns) - literals)
+    if _CASE_INSENSITIVE:
+        literals = frozenset(p.lower() for p in literals)
+    if not globs:
+        return literals, _MATCH_NOTHING
+    flags = re.IGNORECASE if _CASE_INSENSITIVE else 0
+    return literals, re.compile('|'.join(f"(?:{fnmatch.translate(p)})" for p in globs), flags)
+
+@functools.lru_cache(maxsize=32)
+def _load_ignore_config(ignore_file, mtime):
+    """
+    Lee y compila un archivo ignore. La caché usa (ruta, mtime) como clave, así que
+    los proyectos de un batch que comparten archivo no lo vuelven a parsear
+    y un archivo modificado se vuelve a leer.
+    """
+    with open(ignore_file, 'r', encoding='utf-8') as f:
+        config = yaml.load(f, Loader=SafeLoader)
+    ignore_dirs = frozenset(config.get('ignore_directories', []))
+    ignore_files = frozenset(config.get('ignore_files', []))
+    return ignore_dirs, ignore_files, compile_patterns(ignore_dirs), compile_patterns(ignore_files)
+
+def load_ignore_patterns(ignore_file, verbose=False, quiet=False):
     """
     Carga los patrones de ignore desde el archivo YAML.
+    Devuelve los patrones compilados (ver compile_patterns) para directorios y archivos.
     """
     try:
         if os.path.exists(ignore_file):
-            print(f"Cargando archivo ignore: {ignore_file}")
-            with open(ignore_file, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
-                ignore_dirs = set(config.get('ignore_directories', []))
-                ignore_files = set(config.get('ignore_files', []))
-                print(f"Directorios a ignorar: {ignore_dirs}")
-                print(f"Archivos a ignorar: {ignore_files}")
-                return ignore_dirs, ignore_files
+            if not quiet:
+                print(f"Cargando archivo ignore: {ignore_file}")
+            ignore_dirs, ignore_files, dir_patterns, file_patterns = _load_ignore_config(
+                os.path.abspath(ignore_file), os.path.getmtime(ignore_file)
+            )
+            if verbose:
+                print(f"Directorios a ignorar: {set(ignore_dirs)}")
+                print(f"Archivos a ignorar: {set(ignore_files)}")
+            return dir_patterns, file_patterns
         else:
             print(f"Archivo ignore no encontrado: {ignore_file}")
     except Exception as e:
         print(f"Error al cargar {ignore_file}: {str(e)}")
     
-    return set(), set()
+    return _NO_PATTERNS, _NO_PATTERNS
+
+# Etiquetas para los mensajes de --verbose, indexadas por is_dir
+_ENTRY_KINDS = ("archivo", "directorio")
 
-def should_ignore(entry, ignore_dirs, ignore_files):
+def should_ignore(name, is_dir, ignore_table, verbose=False):
     """
     Determina si una entrada debe ser ignorada según los patrones.
+    No accede al sistema de archivos: recibe el nombre y si es directorio.
+    `ignore_table` es (patrones_de_archivos, patrones_de_directorios), indexada por is_dir.
     """
-    name = entry.name
-    
-    if entry.is_dir():
-        should_ignore_dir = any(fnmatch.fnmatch(name, pattern) for pattern in ignore_dirs)
-        if should_ignore_dir:
-            print(f"Ignorando directorio: {name}")
-        return should_ignore_dir
-    else:
-        should_ignore_file = any(fnmatch.fnmatch(name, pattern) for pattern in ignore_files)
-        if should_ignore_file:
-            print(f"Ignorando archivo: {name}")
-        return should_ignore_file
+    literals, globs = ignore_table[is_dir]
+    ignored = (name.lower() if _CASE_INSENSITIVE else name) in literals or globs.match(name) is not None
+    if verbose and ignored:
+        print(f"Ignorando {_ENTRY_KINDS[is_dir]}: {name}")
+    return ignored
 
-def get_tree_chars(is_last):
+# Caracteres del árbol (prefijo de la entrada, prefijo de sus hijos), indexados por is_last
+_TREE = (("├── ", "│   "), ("└── ", "    "))
+
+BRANCH, BRANCH_CHILD = _TREE[False]
+LAST, LAST_CHILD = _TREE[True]
+
+# Número de líneas acumuladas en memoria antes de volcarlas al archivo de salida
+FLUSH_LINES = 64 * 1024
+
+# Buffer del archivo de salida (se escribe en binario, sin la capa TextIOWrapper)
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+def write_lines(file, lines):
     """
-    Retorna los caracteres correctos para el árbol según si es el último elemento.
+    Escribe un bloque de líneas como UTF-8 con un único encode y un único write.
+    Conserva el fin de línea nativo que antes aplicaba el modo texto.
     """
-    if is_last:
-        return "└── ", "    "
-    return "├── ", "│   "
+    text = ''.join(lines)
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    file.write(text.encode('utf-8'))
+
+# En POSIX cada subdirectorio se abre relativo al descriptor de su padre (openat),
+# como os.fwalk: el kernel resuelve un solo componente en lugar de la ruta completa
+_USE_DIR_FD = os.open in os.supports_dir_fd and os.scandir in os.supports_fd
+_DIR_OPEN_FLAGS = os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0) | getattr(os, 'O_CLOEXEC', 0)
+
+# Descriptores abiertos a la vez por recorrido (uno por nivel); por debajo se usan rutas
+MAX_DIR_FDS = 64
+
+# Hilos para recorrer en paralelo los subdirectorios de primer nivel
+# (os.scandir libera el GIL mientras espera al sistema de archivos)
+SCAN_THREADS = 8
 
-def scan_directory(root_path, output_file, ignore_file='ignore.yml', no_files=False, max_depth=None):
+def scan_directory(root_path, output_file, ignore_file='ignore.yml', no_files=False, max_depth=None,
+                   verbose=False, quiet=False):
     """
     Escanea la estructura de directorios y genera un árbol en formato texto.
     """
     # Cargar patrones de ignore
-    ignore_dirs, ignore_files = load_ignore_patterns(ignore_file)
+    ignore_dirs, ignore_files = load_ignore_patterns(ignore_file, verbose, quiet)
+    ignore_table = (ignore_files, ignore_dirs)
     
-    def write_tree(file, path, prefix="", current_depth=0):
+    def list_entries(target):
+        """
+        Lista un directorio ya ordenado (directorios primero) y filtrado.
+        Devuelve tuplas (no_es_directorio, nombre_en_minúsculas, índice, entrada, es_directorio),
+        ordenadas en el sitio: no se crea una segunda lista para quitar la decoración.
+        """
+        # os.scandir reutiliza el tipo que devuelve el sistema (sin un stat extra por entrada)
+        # y el recorrido trabaja con rutas str para no construir objetos Path
+        # is_dir se calcula una sola vez por entrada y se reutiliza en orden, filtro y escritura
+        # Se filtra antes de ordenar y se ordena con tuplas decoradas (comparación en C,
+        # sin lambda); el índice desempata nombres iguales en minúsculas sin comparar DirEntry
+        decorated = []
+        with os.scandir(target) as it:
+            for index, entry in enumerate(it):
+                is_dir = entry.is_dir()
+                if no_files and not is_dir:
+                    continue
+                name = entry.name
+                if not should_ignore(name, is_dir, ignore_table, verbose):
+                    decorated.append((not is_dir, name.lower(), index, entry, is_dir))
+        decorated.sort()
+        return decorated
+    
+    def write_tree(file, out, path, prefix="", current_depth=0, executor=None):
+        """
+        Acumula las líneas del árbol en `out` y las vuelca a `file` por bloques.
+        Con `executor`, cada subdirectorio se recorre en un hilo y en `out` queda
+        su Future (con la lista de líneas) en la posición que le corresponde.
+        
+        El recorrido en profundidad usa una pila explícita en lugar de recursión:
+        cada marco guarda el iterador de entradas del directorio, de modo que al
+        volver de un subdirectorio se continúa justo donde se había quedado.
+        
+        No se usa os.walk: también es Python sobre os.scandir, no baja a los
+        enlaces simbólicos a directorios (que aquí sí se recorren) y obligaría a
+        guardar los archivos de cada directorio hasta terminar sus subárboles.
+        Los directorios ignorados ya se descartan antes de abrirlos.
+        """
+        out_append = out.append
+        stack = []
+        
+        def push(path, prefix, current_depth, name=None, parent_fd=None):
+            fd = None
+            # Filtrar entradas según los patrones de ignore
+            try:
+                if _USE_DIR_FD and len(stack) < MAX_DIR_FDS:
+                    # Con descriptor del padre basta el nombre; sin él, la ruta completa
+                    fd = os.open(name if parent_fd is not None else path, _DIR_OPEN_FLAGS, dir_fd=parent_fd)
+                    entries = list_entries(fd)
+                else:
+                    entries = list_entries(path)
+            except PermissionError:
+                out_append(f"{prefix}!-- Permiso denegado --!\n")
+            except Exception as e:
+                out_append(f"{prefix}!-- Error: {str(e)} --!\n")
+            else:
+                # Prefijos de línea y de hijos unidos una sola vez por directorio
+                stack.append((iter(enumerate(entries)), len(entries) - 1,
+                              (prefix + BRANCH, prefix + BRANCH_CHILD),
+                              (prefix + LAST, prefix + LAST_CHILD),
+                              current_depth, path, fd))
+                return
+            if fd is not None:
+                os.close(fd)
+        
         if max_depth is not None and current_depth > max_depth:
             return
-            
-        # Filtrar entradas según los patrones de ignore
+        push(path, prefix, current_depth)
         try:
-            entries = path.iterdir()
-            filtered_entries = []
-            for entry in sorted(entries, key=lambda x: (not x.is_dir(), x.name.lower())):
-                if not should_ignore(entry, ignore_dirs, ignore_files):
-                    filtered_entries.append(entry)
-                
-            entries = filtered_entries
+            while stack:
+                # Limitar la memoria en árboles muy grandes (solo quien escribe al archivo)
+                if file is not None and len(out) >= FLUSH_LINES:
+                    write_lines(file, out)
+                    out.clear()
             
-            if no_files:
-                entries = [e for e in entries if e.is_dir()]
+                entries, last_index, branch_prefixes, last_prefixes, current_depth, path, fd = stack[-1]
+                # En el último nivel permitido los subdirectorios se listan sin abrirlos (sin scandir)
+                descend = max_depth is None or current_depth < max_depth
+                for i, (_, _, _, entry, is_dir) in entries:
+                    line_prefix, child_prefix = last_prefixes if i == last_index else branch_prefixes
                 
-            for i, entry in enumerate(entries):
-                is_last = i == len(entries) - 1
-                current_prefix, child_prefix = get_tree_chars(is_last)
-                
-                file.write(f"{prefix}{current_prefix}{entry.name}")
-                if entry.is_dir():
-                    file.write("/\n")
-                    write_tree(file, entry, prefix + child_prefix, current_depth + 1)
+                    if is_dir:
+                        out_append(f"{line_prefix}{entry.name}/\n")
+                        if not descend:
+                            continue
+                        # Con scandir(fd) entry.path es solo el nombre: la ruta se arma aquí
+                        child_path = os.path.join(path, entry.name)
+                        if executor is not None:
+                            out_append(executor.submit(collect_subtree, child_path,
+                                                       child_prefix, current_depth + 1))
+                        else:
+                            # Bajar al subdirectorio; este marco continúa después
+                            push(child_path, child_prefix, current_depth + 1, entry.name, fd)
+                            break
+                    else:
+                        out_append(f"{line_prefix}{entry.name}\n")
                 else:
-                    file.write("\n")
-        except PermissionError:
-            file.write(f"{prefix}!-- Permiso denegado --!\n")
-        except Exception as e:
-            file.write(f"{prefix}!-- Error: {str(e)} --!\n")
+                    stack.pop()
+                    if fd is not None:
+                        os.close(fd)
+        finally:
+            # Cerrar los descriptores que sigan abiertos si el recorrido se interrumpe
+            for frame in stack:
+                if frame[-1] is not None:
+                    os.close(frame[-1])
+    
+    def collect_subtree(path, prefix, current_depth):
+        """
+        Recorre un subárbol en su propio buffer (se ejecuta en un hilo del pool).
+        Cada FLUSH_LINES líneas el buffer se vuelca a un archivo temporal, así un
+        subárbol enorme no queda entero en memoria hasta que llega su turno.
+        Devuelve (archivo temporal, líneas restantes).
+        """
+        spill = tempfile.SpooledTemporaryFile(max_size=OUTPUT_BUFFER_SIZE)
+        subtree = []
+        try:
+            write_tree(spill, subtree, path, prefix, current_depth)
+        except BaseException:
+            spill.close()
+            raise
+        return spill, subtree
 
-    # Crear el objeto Path para manejar rutas
-    root = Path(root_path).resolve()
+    # os.path.abspath no resuelve enlaces simbólicos (sin readlink/lstat por componente)
+    root = os.path.abspath(root_path)
     
     # Verificar que el directorio existe
-    if not root.exists():
+    if not os.path.isdir(root):
         raise FileNotFoundError(f"El directorio {root_path} no existe")
     
-    print(f"\nEscaneando directorio: {root}")
-    print(f"Usando archivo ignore: {ignore_file}\n")
+    if not quiet:
+        print(f"\nEscaneando directorio: {root}")
+        print(f"Usando archivo ignore: {ignore_file}\n")
     
     # Abrir archivo de salida
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with open(output_file, 'wb', buffering=OUTPUT_BUFFER_SIZE) as f:
         # Agregar metadata al archivo
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"# Estructura de directorios generada el {timestamp}\n")
-        f.write(f"# Directorio escaneado: {root}\n")
-        f.write(f"# Archivo ignore utilizado: {ignore_file}\n")
-        f.write(f"# Solo directorios: {'Sí' if no_files else 'No'}\n")
-        f.write(f"# Profundidad máxima: {'Sin límite' if max_depth is None else max_depth}\n")
-        f.write(f"{'='*60}\n\n")
-        
-        f.write(f"{root.name}/\n")
-        write_tree(f, root)
+        out = [
+            f"# Estructura de directorios generada el {timestamp}\n",
+            f"# Directorio escaneado: {root}\n",
+            f"# Archivo ignore utilizado: {ignore_file}\n",
+            f"# Solo directorios: {'Sí' if no_files else 'No'}\n",
+            f"# Profundidad máxima: {'Sin límite' if max_depth is None else max_depth}\n",
+            f"{'='*60}\n\n",
+            f"{os.path.basename(root)}/\n",
+        ]
+        with ThreadPoolExecutor(max_workers=SCAN_THREADS) as executor:
+            # La raíz solo contiene sus entradas directas y los Future de cada
+            # subárbol: no se vuelca por bloques (cada subárbol lo hace por su cuenta)
+            write_tree(None, out, root, executor=executor)
+            # Empalmar los subárboles en el orden del listado
+            pending = []
+            for chunk in out:
+                if isinstance(chunk, Future):
+                    write_lines(f, pending)
+                    pending.clear()
+                    spill, lines = chunk.result()
+                    with spill:
+                        if spill.tell():
+                            spill.seek(0)
+                            shutil.copyfileobj(spill, f, OUTPUT_BUFFER_SIZE)
+                    write_lines(f, lines)
+                else:
+                    pending.append(chunk)
+            write_lines(f, pending)
+
+def _scan_project(scan_kwargs):
+    """
+    Ejecuta scan_directory para un proyecto del batch (en un proceso del pool).
+    Devuelve la salida capturada y el mensaje de error (None si terminó bien),
+    para que los mensajes de proyectos concurrentes no se mezclen en la consola.
+    """
+    buffer = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(buffer):
+        try:
+            scan_directory(**scan_kwargs)
+        except Exception as e:
+            error = str(e)
+    return buffer.getvalue(), error
 
-def run_batch(batch_file):
+def _report_project(index, total, output, log, error, quiet=False):
+    """
+    Muestra el resultado de un proyecto del batch junto con su salida capturada.
+    En modo silencioso solo se informan los proyectos con error.
+    """
+    if quiet and error is None:
+        return
+    print(f"\n[{index}/{total}] Resultado:")
+    if log.strip():
+        print(log.rstrip())
+    if error is None:
+        print(f"  ✓ Estructura guardada exitosamente en: {output}")
+    else:
+        print(f"  ✗ Error al procesar proyecto {index}: {error}")
+
+def run_batch(batch_file, verbose=False, quiet=False):
     """
     Ejecuta el escaneo masivo basado en un archivo de configuración YAML.
     """
@@ -253,16 +487,18 @@ def run_batch(batch_file):
             raise FileNotFoundError(f"El archivo de configuración batch no existe: {batch_file}")
         
         with open(batch_file, 'r', encoding='utf-8') as f:
-            batch_config = yaml.safe_load(f)
+            batch_config = yaml.load(f, Loader=SafeLoader)
         
         projects = batch_config.get('projects', [])
         if not projects:
             print("No se encontraron proyectos en el archivo de configuración batch")
             return
         
-        print(f"Iniciando escaneo masivo de {len(projects)} proyecto(s)...")
-        print("="*60)
+        if not quiet:
+            print(f"Iniciando escaneo masivo de {len(projects)} proyecto(s)...")
+            print("="*60)
         
+        jobs = []
         for i, project in enumerate(projects, 1):
             # Validar campos requeridos
             path = project.get('path')
@@ -276,28 +512,48 @@ def run_batch(batch_file):
             no_files = project.get('no_files', False)
             max_depth = project.get('max_depth')  # None si no se especifica
             
-            print(f"\n[{i}/{len(projects)}] Procesando proyecto:")
-            print(f"  - Ruta: {path}")
-            print(f"  - Archivo ignore: {ignore_file}")
-            print(f"  - Archivo salida: {output}")
-            print(f"  - Solo directorios: {'Sí' if no_files else 'No'}")
-            print(f"  - Profundidad máxima: {'Sin límite' if max_depth is None else max_depth}")
+            if not quiet:
+                print(f"\n[{i}/{len(projects)}] Procesando proyecto:")
+                print(f"  - Ruta: {path}")
+                print(f"  - Archivo ignore: {ignore_file}")
+                print(f"  - Archivo salida: {output}")
+                print(f"  - Solo directorios: {'Sí' if no_files else 'No'}")
+                print(f"  - Profundidad máxima: {'Sin límite' if max_depth is None else max_depth}")
             
-            try:
-                scan_directory(
-                    path,
-                    output,
-                    ignore_file=ignore_file,
-                    no_files=no_files,
-                    max_depth=max_depth
-                )
-                print(f"  ✓ Estructura guardada exitosamente en: {output}")
-            except Exception as e:
-                print(f"  ✗ Error al procesar proyecto {i}: {str(e)}")
-                continue
+            jobs.append((i, output, {
+                'root_path': path,
+                'output_file': output,
+                'ignore_file': ignore_file,
+                'no_files': no_files,
+                'max_depth': max_depth,
+                'verbose': verbose,
+                # La configuración del proyecto ya se mostró arriba
+                'quiet': True,
+            }))
+        
+        # Cada proyecto es independiente: se escanean en paralelo en procesos separados
+        # (el recorrido es Python puro y está limitado por el GIL)
+        if len(jobs) > 1:
+            if not quiet:
+                print(f"\nEscaneando {len(jobs)} proyecto(s) en paralelo...")
+            with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as executor:
+                futures = {executor.submit(_scan_project, scan_kwargs): (i, output)
+                           for i, output, scan_kwargs in jobs}
+                for future in as_completed(futures):
+                    i, output = futures[future]
+                    try:
+                        log, error = future.result()
+                    except Exception as e:
+                        log, error = "", str(e)
+                    _report_project(i, len(projects), output, log, error, quiet)
+        else:
+            for i, output, scan_kwargs in jobs:
+                log, error = _scan_project(scan_kwargs)
+                _report_project(i, len(projects), output, log, error, quiet)
         
-        print("\n" + "="*60)
-        print("Escaneo masivo completado")
+        if not quiet:
+            print("\n" + "="*60)
+            print("Escaneo masivo completado")
         
     except Exception as e:
         print(f"Error en el escaneo masivo: {e}")
@@ -314,7 +570,7 @@ def main():
             # Modo batch
             if args.path:
                 print("Advertencia: El argumento 'path' será ignorado al usar --batch-config")
-            run_batch(args.batch_config)
+            run_batch(args.batch_config, verbose=args.verbose, quiet=args.quiet)
         else:
             # Modo individual
             if not args.path:
@@ -326,9 +582,12 @@ def main():
                 args.output,
                 ignore_file=args.ignore_file,
                 no_files=args.no_files,
-                max_depth=args.max_depth
+                max_depth=args.max_depth,
+                verbose=args.verbose,
+                quiet=args.quiet
             )
-            print(f"\nEstructura guardada exitosamente en: {args.output}")
+            if not args.quiet:
+                print(f"\nEstructura guardada exitosamente en: {args.output}")
         
     except Exception as e:
         print(f"Error: {str(e)}")
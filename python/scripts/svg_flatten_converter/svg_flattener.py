@@ -13,23 +13,60 @@ Uso:
 """
 
 import argparse
-import svgpathtools
+import logging
+import re
+import sys
+from itertools import repeat
+from functools import cached_property
 from xml.etree import ElementTree as ET
-from typing import Dict, Tuple, Optional, List
+from typing import Dict, Tuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Valor por defecto de los atributos numéricos ausentes (ya float: sin coerción int→float)
+_ZERO = 0.0
+
+# Números SVG: signo, decimales sin parte entera (.5) y exponente (1e-3)
+_NUMBER_RE = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def _floats(attrib: Dict[str, str], keys: Tuple[str, ...]) -> Tuple[float, ...]:
+    """Lee varios atributos numéricos de una vez (0.0 si faltan)."""
+    return tuple(map(float, map(attrib.get, keys, repeat(_ZERO))))
 
 
 class SVGShapeConverter:
-    """Convierte elementos SVG básicos a datos de path."""
+    """Convierte elementos SVG básicos a datos de path.
+
+    Los conversores son Python puro a propósito. Casi todo su tiempo se va en
+    float() y en formatear floats a texto, que ya son rutinas en C; una
+    extensión Cython solo ahorraría el despacho entre llamadas y obligaría
+    a compilar el script en cada plataforma. Los puntos de polyline/polygon,
+    el único caso con bucles largos, ya se procesan por lotes con map/join.
+    """
     
     @staticmethod
     def rect_to_path(attrib: Dict[str, str]) -> str:
         """Convierte un rectángulo a path data."""
-        x = float(attrib.get('x', 0))
-        y = float(attrib.get('y', 0))
-        width = float(attrib.get('width', 0))
-        height = float(attrib.get('height', 0))
-        rx = float(attrib.get('rx', 0))
-        ry = float(attrib.get('ry', rx))
+        # La mayoría de rects no tienen esquinas redondeadas: ni se buscan rx/ry
+        if 'rx' in attrib or 'ry' in attrib:
+            return SVGShapeConverter._rect_rounded(attrib)
+        return SVGShapeConverter._rect_square(attrib)
+
+    @staticmethod
+    def _rect_square(attrib: Dict[str, str]) -> str:
+        """Rectángulo sin rx/ry."""
+        x, y, width, height = _floats(attrib, ('x', 'y', 'width', 'height'))
+        return f"M {x} {y} H {x + width} V {y + height} H {x} Z"
+
+    @staticmethod
+    def _rect_rounded(attrib: Dict[str, str]) -> str:
+        """Rectángulo con rx y/o ry."""
+        x, y, width, height = _floats(attrib, ('x', 'y', 'width', 'height'))
+        rx = attrib.get('rx')
+        ry = attrib.get('ry')
+        rx = float(rx) if rx is not None else 0.0
+        ry = float(ry) if ry is not None else rx
 
         if rx > 0 or ry > 0:
             rx = min(rx, width / 2)
@@ -51,9 +88,7 @@ class SVGShapeConverter:
     @staticmethod
     def circle_to_path(attrib: Dict[str, str]) -> str:
         """Convierte un círculo a path data."""
-        cx = float(attrib.get('cx', 0))
-        cy = float(attrib.get('cy', 0))
-        r = float(attrib.get('r', 0))
+        cx, cy, r = _floats(attrib, ('cx', 'cy', 'r'))
         return (
             f"M {cx - r} {cy} "
             f"A {r} {r} 0 1 0 {cx + r} {cy} "
@@ -63,10 +98,7 @@ class SVGShapeConverter:
     @staticmethod
     def ellipse_to_path(attrib: Dict[str, str]) -> str:
         """Convierte una elipse a path data."""
-        cx = float(attrib.get('cx', 0))
-        cy = float(attrib.get('cy', 0))
-        rx = float(attrib.get('rx', 0))
-        ry = float(attrib.get('ry', 0))
+        cx, cy, rx, ry = _floats(attrib, ('cx', 'cy', 'rx', 'ry'))
         return (
             f"M {cx - rx} {cy} "
             f"A {rx} {ry} 0 1 0 {cx + rx} {cy} "
@@ -76,63 +108,63 @@ class SVGShapeConverter:
     @staticmethod
     def line_to_path(attrib: Dict[str, str]) -> str:
         """Convierte una línea a path data."""
-        x1 = float(attrib.get('x1', 0))
-        y1 = float(attrib.get('y1', 0))
-        x2 = float(attrib.get('x2', 0))
-        y2 = float(attrib.get('y2', 0))
+        x1, y1, x2, y2 = _floats(attrib, ('x1', 'y1', 'x2', 'y2'))
         return f"M {x1} {y1} L {x2} {y2}"
 
+    @staticmethod
+    def _points_to_path(points_str: str) -> str:
+        """Convierte el atributo points (pares separados por comas y/o espacios) a path data."""
+        # Todo el atributo se procesa por lotes con map/zip/join (bucles en C),
+        # sin código Python por vértice; str(float) coincide con el f-string
+        coords = list(map(str, map(float, _NUMBER_RE.findall(points_str))))
+        if len(coords) < 2:
+            return ""
+
+        points = map(" ".join, zip(coords[0::2], coords[1::2]))
+        return "M " + " L ".join(points)
+
     @staticmethod
     def polyline_to_path(attrib: Dict[str, str]) -> str:
         """Convierte una polilínea a path data."""
-        points_str = attrib.get('points', '')
-        points = [tuple(map(float, p.split(','))) for p in points_str.strip().split()]
-        
-        if not points:
-            return ""
-            
-        path_data = f"M {points[0][0]} {points[0][1]}"
-        for p_x, p_y in points[1:]:
-            path_data += f" L {p_x} {p_y}"
-        return path_data
+        return SVGShapeConverter._points_to_path(attrib.get('points', ''))
 
     @staticmethod
     def polygon_to_path(attrib: Dict[str, str]) -> str:
         """Convierte un polígono a path data."""
-        points_str = attrib.get('points', '')
-        points = [tuple(map(float, p.split(','))) for p in points_str.strip().split()]
-        
-        if not points:
-            return ""
-            
-        path_data = f"M {points[0][0]} {points[0][1]}"
-        for p_x, p_y in points[1:]:
-            path_data += f" L {p_x} {p_y}"
-        return path_data + " Z"
+        path_data = SVGShapeConverter._points_to_path(attrib.get('points', ''))
+        return path_data + " Z" if path_data else ""
 
     @classmethod
-    def convert_shape_to_path(cls, element, parent_attrib: Dict[str, str]) -> Tuple[Optional[str], Dict[str, str]]:
-        """Convierte un elemento SVG a path data."""
-        tag = element.tag.split('}')[-1]
+    def convert_shape_to_path(cls, element, parent_attrib: Dict[str, str],
+                              tag: Optional[str] = None) -> Tuple[Optional[str], Dict[str, str]]:
+        """Convierte un elemento SVG a path data.
+
+        tag es el nombre local del elemento; si se omite se deriva de element.tag.
+        """
+        if tag is None:
+            tag = element.tag.split('}')[-1]
         attrib = {**parent_attrib, **element.attrib}
 
-        converters = {
-            'rect': cls.rect_to_path,
-            'circle': cls.circle_to_path,
-            'ellipse': cls.ellipse_to_path,
-            'line': cls.line_to_path,
-            'polyline': cls.polyline_to_path,
-            'polygon': cls.polygon_to_path,
-        }
-
-        if tag in converters:
-            return converters[tag](attrib), attrib
+        converter = cls._CONVERTERS.get(tag)
+        if converter is not None:
+            return converter(attrib), attrib
         elif tag == 'path':
             return attrib.get('d', ''), attrib
         
         return None, attrib
 
 
+# Tabla de conversores por etiqueta; se crea una vez, no en cada elemento
+SVGShapeConverter._CONVERTERS = {
+    'rect': SVGShapeConverter.rect_to_path,
+    'circle': SVGShapeConverter.circle_to_path,
+    'ellipse': SVGShapeConverter.ellipse_to_path,
+    'line': SVGShapeConverter.line_to_path,
+    'polyline': SVGShapeConverter.polyline_to_path,
+    'polygon': SVGShapeConverter.polygon_to_path,
+}
+
+
 class SVGFlattener:
     """Clase principal para aplanar archivos SVG."""
     
@@ -149,66 +181,105 @@ class SVGFlattener:
     def __init__(self, input_file: str):
         """Inicializa el flattener con un archivo SVG."""
         self.input_file = input_file
-        self.doc = None
+        self.root = None
+        self._events = None
+        self._convertible_tags: Dict[str, str] = {}
         self.converter = SVGShapeConverter()
         
     def _load_svg(self) -> None:
-        """Carga el archivo SVG."""
+        """Abre el SVG en streaming y lee el elemento raíz.
+
+        El resto del documento se consume en _extract_path_data con el mismo
+        iterparse, sin construir el árbol completo en memoria.
+        """
         try:
-            self.doc = svgpathtools.Document(self.input_file)
-        except Exception as e:
+            self._events = ET.iterparse(self.input_file, events=('start', 'end'))
+            _, self.root = next(self._events)
+        except (ET.ParseError, OSError, StopIteration) as e:
             raise ValueError(f"Error al cargar el archivo SVG: {e}")
+
+        # Etiqueta completa '{ns}rect' -> 'rect' para el namespace de la raíz:
+        # el bucle resuelve cada elemento con una sola búsqueda en el dict
+        root_tag = self.root.tag
+        namespace = root_tag[:root_tag.index('}') + 1] if root_tag.startswith('{') else ''
+        self._convertible_tags = {namespace + tag: tag for tag in self.CONVERTIBLE_ELEMENTS}
     
-    def _get_root_attributes(self) -> Dict[str, str]:
-        """Obtiene los atributos del elemento raíz del SVG."""
-        if self.doc.root is None:
-            print("Warning: No se encontró elemento raíz, usando atributos por defecto")
-            return self.DEFAULT_ATTRIBUTES.copy()
-            
-        print(f"Extrayendo atributos del elemento raíz...")
+    @cached_property
+    def root_attributes(self) -> Dict[str, str]:
+        """Atributos de estilo del elemento raíz (se calculan una sola vez)."""
+        if self.root is None:
+            self._load_svg()
+
+        logger.debug("Extrayendo atributos del elemento raíz...")
         attributes = {}
         for key, default_value in self.DEFAULT_ATTRIBUTES.items():
-            attributes[key] = self.doc.root.get(key, default_value)
+            attributes[key] = self.root.get(key, default_value)
             
         # Agregar atributos adicionales si existen
         for attr in ['transform', 'style', 'opacity']:
-            value = self.doc.root.get(attr)
+            value = self.root.get(attr)
             if value:
                 attributes[attr] = value
                 
-        print(f"Atributos raíz extraídos: {list(attributes.keys())}")
+        logger.debug("Atributos raíz extraídos: %s", list(attributes))
         return attributes
     
-    def _extract_path_data(self) -> List[str]:
-        """Extrae todos los datos de path de los elementos convertibles."""
-        print("Iniciando extracción de datos de path...")
-        root_attributes = self._get_root_attributes()
+    def _extract_path_data(self) -> str:
+        """Extrae y combina los datos de path de todos los elementos convertibles.
+
+        La lista de fragmentos es local y se une una sola vez al final, de modo
+        que no sigue viva mientras se construye y escribe el SVG de salida.
+        """
+        logger.debug("Iniciando extracción de datos de path...")
+        root_attributes = self.root_attributes
         path_data_list = []
         element_count = 0
         
-        for element in self.doc.tree.iter():
-            tag = element.tag.split('}')[-1]
-            
-            if tag in self.CONVERTIBLE_ELEMENTS:
-                element_count += 1
-                print(f"Procesando elemento {element_count}: {tag}")
-                path_data, _ = self.converter.convert_shape_to_path(element, root_attributes)
-                if path_data:
-                    path_data_list.append(path_data)
-                    print(f"  ✓ Convertido a path data (longitud: {len(path_data)} caracteres)")
-                else:
-                    print(f"  ⚠ No se pudo convertir el elemento {tag}")
-                    
-        print(f"Extracción completada: {len(path_data_list)} elementos convertidos de {element_count} procesados")
-        return path_data_list
+        root = self.root
+        # Se evalúa una vez: sin DEBUG activo el bucle no formatea nada
+        debug = logger.isEnabledFor(logging.DEBUG)
+        # Enlaces locales: el bucle no resuelve atributos de self por elemento
+        convertible = self._convertible_tags.get
+        convert = self.converter.convert_shape_to_path
+        append = path_data_list.append
+
+        try:
+            for event, element in self._events:
+                if event != 'end':
+                    continue
+
+                tag = convertible(element.tag)
+
+                if tag is not None:
+                    element_count += 1
+                    if debug:
+                        logger.debug("Procesando elemento %d: %s", element_count, tag)
+                    path_data, _ = convert(element, root_attributes, tag)
+                    if path_data:
+                        append(path_data)
+                        if debug:
+                            logger.debug("  ✓ Convertido a path data (longitud: %d caracteres)", len(path_data))
+                    else:
+                        logger.warning("  ⚠ No se pudo convertir el elemento %s", tag)
+
+                # Elemento ya procesado: liberar sus atributos e hijos.
+                # La raíz se conserva porque sus atributos se copian a la salida.
+                if element is not root:
+                    element.clear()
+        except ET.ParseError as e:
+            raise ValueError(f"Error al cargar el archivo SVG: {e}")
+
+        logger.info("Extracción completada: %d elementos convertidos de %d procesados",
+                    len(path_data_list), element_count)
+        return " ".join(path_data_list)
     
     def _create_flattened_svg(self, combined_path_data: str) -> ET.Element:
         """Crea un nuevo elemento SVG con el path combinado."""
-        print("Creando estructura SVG aplanada...")
+        logger.debug("Creando estructura SVG aplanada...")
         root = ET.Element('svg')
         
-        if self.doc.root is not None:
-            print("Copiando atributos del SVG original...")
+        if self.root is not None:
+            logger.debug("Copiando atributos del SVG original...")
             # Copiar atributos básicos del SVG
             basic_attrs = ['width', 'height', 'viewBox', 'xmlns']
             defaults = {
@@ -219,61 +290,65 @@ class SVGFlattener:
             }
             
             for attr in basic_attrs:
-                value = self.doc.root.get(attr, defaults.get(attr))
+                value = self.root.get(attr, defaults.get(attr))
                 if value:
                     root.set(attr, value)
             
-            # Copiar otros atributos relevantes
+            # Copiar otros atributos relevantes. Los de estilo se omiten en el
+            # <svg> porque van en el <path> (root_attributes): así ningún
+            # atributo se emite dos veces y no hace falta comparar ambos
             style_attrs = {'fill', 'stroke', 'stroke-width', 'stroke-linecap', 
                           'stroke-linejoin', 'transform', 'style', 'opacity'}
             
             additional_attrs = 0
-            for attr, value in self.doc.root.attrib.items():
+            for attr, value in self.root.attrib.items():
                 if attr not in basic_attrs and attr not in style_attrs:
                     root.set(attr, value)
                     additional_attrs += 1
             
-            print(f"Atributos copiados: {len(basic_attrs)} básicos, {additional_attrs} adicionales")
+            logger.debug("Atributos copiados: %d básicos, %d adicionales", len(basic_attrs), additional_attrs)
         else:
-            print("Warning: No se encontró elemento raíz, usando configuración por defecto")
+            logger.warning("Warning: No se encontró elemento raíz, usando configuración por defecto")
         
         # Crear el elemento path combinado
         if combined_path_data:
-            print(f"Creando path combinado (longitud: {len(combined_path_data)} caracteres)...")
+            logger.debug("Creando path combinado (longitud: %d caracteres)...", len(combined_path_data))
             path_element = ET.SubElement(root, 'path')
             path_element.set('d', combined_path_data)
+            # Sangría fija del único hijo (equivale a ET.indent sin recorrer el árbol)
+            root.text = "\n  "
+            path_element.tail = "\n"
             
             # Aplicar atributos de estilo
-            root_attributes = self._get_root_attributes()
+            root_attributes = self.root_attributes
             style_count = 0
             for key, value in root_attributes.items():
                 path_element.set(key, value)
                 style_count += 1
-            print(f"Aplicados {style_count} atributos de estilo al path")
+            logger.debug("Aplicados %d atributos de estilo al path", style_count)
         else:
-            print("Warning: No hay datos de path para combinar")
+            logger.warning("Warning: No hay datos de path para combinar")
         
-        print("Estructura SVG aplanada creada exitosamente")
+        logger.debug("Estructura SVG aplanada creada exitosamente")
         return root
     
     def flatten_to_file(self, output_file: str) -> None:
         """Aplana el SVG y lo guarda en un archivo."""
-        print(f"Iniciando procesamiento del archivo: {self.input_file}")
+        logger.info("Iniciando procesamiento del archivo: %s", self.input_file)
         self._load_svg()
-        print(f"✓ Archivo SVG cargado exitosamente")
+        logger.info("✓ Archivo SVG cargado exitosamente")
         
-        path_data_list = self._extract_path_data()
-        combined_path_data = " ".join(path_data_list)
-        print(f"Path data combinado: {len(combined_path_data)} caracteres totales")
+        combined_path_data = self._extract_path_data()
+        logger.info("Path data combinado: %d caracteres totales", len(combined_path_data))
         
         flattened_root = self._create_flattened_svg(combined_path_data)
         
         try:
-            print(f"Guardando archivo aplanado en: {output_file}")
+            logger.info("Guardando archivo aplanado en: %s", output_file)
             tree = ET.ElementTree(flattened_root)
-            ET.indent(tree, space="  ", level=0)
-            tree.write(output_file, encoding='utf-8', xml_declaration=True)
-            print(f"✓ SVG aplanado guardado exitosamente en: {output_file}")
+            tree.write(output_file, encoding='utf-8', xml_declaration=True,
+                       short_empty_elements=True)
+            logger.info("✓ SVG aplanado guardado exitosamente en: %s", output_file)
         except Exception as e:
             raise IOError(f"Error al guardar el archivo SVG: {e}")
 
@@ -287,6 +362,8 @@ def parse_arguments() -> argparse.Namespace:
     )
     parser.add_argument("input_file", help="Archivo SVG de entrada")
     parser.add_argument("output_file", help="Archivo SVG de salida")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Mostrar el detalle de cada elemento procesado")
     return parser.parse_args()
 
 
@@ -295,6 +372,12 @@ def main() -> int:
     try:
         print("=== SVG Flattener v2.0.0 ===")
         args = parse_arguments()
+        # Mismo stream que print para conservar el orden de la salida
+        logging.basicConfig(
+            level=logging.DEBUG if args.verbose else logging.INFO,
+            format="%(message)s",
+            stream=sys.stdout,
+        )
         print(f"Archivo de entrada: {args.input_file}")
         print(f"Archivo de salida: {args.output_file}")
         print("-" * 40)
@@ -7,7 +7,7 @@ Permite convertir archivos WEBP a PNG desde la línea de comandos.
 import argparse
 import os
 import sys
-from webp_to_png_converter import WebpToPngConverter
+from webp_to_png_converter import WebpToPngConverter, DEFAULT_COMPRESS_LEVEL
 
 def parse_args():
     """Configura y parsea los argumentos de línea de comandos."""
@@ -23,15 +23,24 @@ def parse_args():
     # Argumentos opcionales
     parser.add_argument('-o', '--output', help='Ruta o directorio de salida para los archivos PNG')
     parser.add_argument('-v', '--verbose', action='store_true', help='Mostrar información detallada')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='Número de procesos para convertir un directorio (por defecto: número de CPUs)')
+    parser.add_argument('-c', '--compress-level', type=int, choices=range(10),
+                        default=DEFAULT_COMPRESS_LEVEL, metavar='{0-9}',
+                        help=f'Nivel de compresión del PNG; 1 es mucho más rápido que el valor por defecto ({DEFAULT_COMPRESS_LEVEL})')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error('--jobs debe ser un entero mayor o igual a 1')
+    
+    return args
 
 def main():
     """Función principal del script."""
     args = parse_args()
     
     # Crear instancia del conversor
-    converter = WebpToPngConverter()
+    converter = WebpToPngConverter(compress_level=args.compress_level)
     
     try:
         if args.file:
@@ -56,7 +65,7 @@ def main():
                 sys.exit(1)
                 
             # Convertir todos los archivos en el directorio
-            converted_files = converter.convert_directory(args.directory, args.output)
+            converted_files = converter.convert_directory(args.directory, args.output, jobs=args.jobs)
             
             if converted_files:
                 print(f"Conversión exitosa de {len(converted_files)} archivos:")
@@ -88,5 +97,11 @@ if __name__ == "__main__":
 # Para ver información detallada sobre los archivos convertidos
 # python webp_converter_main.py -d carpeta_con_webps -v
 
+# Para limitar el número de procesos usados al convertir un directorio
+# python webp_converter_main.py -d carpeta_con_webps -j 4
+
+# Para priorizar velocidad sobre tamaño de archivo
+# python webp_converter_main.py -d carpeta_con_webps -c 1
+
 # Para convertir un directorio y especificar el directorio de salida
 # python webp_converter_main.py -d "C:\Users\ronald.cuello\Downloads\DALLE webp Images\convert" -o "C:\Users\ronald.cuello\Downloads\DALLE webp Images\converted"
\ No newline at end of file
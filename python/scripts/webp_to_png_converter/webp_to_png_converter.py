@@ -1,23 +1,74 @@
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
 import os
 import logging
 
+# Nivel zlib por defecto de Pillow: 0 (sin compresión) a 9 (máxima)
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Buffer de escritura del PNG: el codificador emite bloques pequeños
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _convert_one(input_path, output_path, compress_level=DEFAULT_COMPRESS_LEVEL):
+    """
+    Abre un archivo WEBP y lo guarda como PNG.
+    
+    Es una función de módulo (y no un método) para que pueda enviarse
+    a los procesos de un ProcessPoolExecutor.
+    
+    No se decodifica con libwebp directamente ni se escribe el PNG a mano:
+    el plugin WebP de Pillow ya es libwebp decodificando a un buffer nativo,
+    y el codificador PNG de Pillow aplica filtros adaptativos por fila que
+    un escritor propio con filtro 0 perdería (archivos más grandes). El
+    costo real está en zlib, que se controla con compress_level.
+    
+    Returns:
+        str: Ruta del archivo PNG generado.
+    """
+    with open(input_path, 'rb') as src, Image.open(src) as img:
+        img.load()
+        # El WEBP ya está decodificado: evitar que llene la caché de páginas
+        # cuando se convierten miles de archivos (solo POSIX)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        
+        # Un RGBA totalmente opaco se guarda como RGB: menos datos que comprimir
+        if img.mode == 'RGBA' and img.getextrema()[3] == (255, 255):
+            img = img.convert('RGB')
+        
+        try:
+            with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as dst:
+                # El codificador lee directamente el buffer ya decodificado;
+                # pasar por tobytes()/frombuffer() añadiría una copia completa
+                img.save(dst, 'PNG', compress_level=compress_level, optimize=False)
+        except Exception:
+            # No dejar un PNG a medio escribir
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise
+    return output_path
+
+
 class WebpToPngConverter:
     """
     Clase simple para convertir archivos WEBP a formato PNG.
     Utiliza la biblioteca Pillow (PIL) para las operaciones de imagen.
     """
     
-    def __init__(self, input_path=None, output_path=None):
+    def __init__(self, input_path=None, output_path=None, compress_level=DEFAULT_COMPRESS_LEVEL):
         """
         Inicializa el conversor con rutas de entrada y salida opcionales.
         
         Args:
             input_path (str, optional): Ruta del archivo WEBP de entrada.
             output_path (str, optional): Ruta donde guardar el archivo PNG convertido.
+            compress_level (int, optional): Nivel de compresión zlib del PNG (0-9).
+                Valores bajos convierten más rápido a cambio de archivos más grandes.
         """
         self.input_path = input_path
         self.output_path = output_path
+        self.compress_level = compress_level
         self._setup_logging()
     
     def _setup_logging(self):
@@ -66,9 +117,7 @@ class WebpToPngConverter:
         try:
             # Abrir y convertir la imagen
             self.logger.info(f"Convirtiendo {input_path} a PNG")
-            with Image.open(input_path) as img:
-                # Guardar como PNG
-                img.save(output_path, 'PNG')
+            _convert_one(input_path, output_path, self.compress_level)
             
             self.logger.info(f"Conversión completada. Archivo guardado en {output_path}")
             return output_path
@@ -77,14 +126,20 @@ class WebpToPngConverter:
             self.logger.error(f"Error durante la conversión: {str(e)}")
             raise
     
-    def convert_directory(self, input_dir, output_dir=None):
+    def convert_directory(self, input_dir, output_dir=None, jobs=None):
         """
         Convierte todos los archivos WEBP en un directorio a PNG.
         
+        Cada archivo se convierte en un proceso independiente, ya que
+        decodificar y codificar imágenes es trabajo de CPU.
+        
         Args:
             input_dir (str): Directorio con archivos WEBP.
             output_dir (str, optional): Directorio donde guardar los archivos PNG.
                 Si no se proporciona, se guardan en el mismo directorio.
+            jobs (int, optional): Número de procesos a utilizar.
+                Si no se proporciona, se usa el número de CPUs. Con 1 se
+                convierte de forma secuencial en el proceso actual.
                 
         Returns:
             list: Lista de rutas de los archivos PNG generados.
@@ -99,19 +154,41 @@ class WebpToPngConverter:
             os.makedirs(output_dir)
         
         converted_files = []
+        tasks = []
         
-        # Iterar sobre todos los archivos en el directorio
-        for filename in os.listdir(input_dir):
-            if filename.lower().endswith('.webp'):
-                input_path = os.path.join(input_dir, filename)
-                output_filename = os.path.splitext(filename)[0] + '.png'
-                output_path = os.path.join(output_dir, output_filename)
-                
+        # Iterar sobre los archivos del directorio; scandir ya trae la ruta
+        # completa y el tipo de cada entrada sin llamadas stat adicionales
+        with os.scandir(input_dir) as entries:
+            for entry in entries:
+                filename = entry.name
+                if filename.lower().endswith('.webp') and entry.is_file():
+                    output_filename = os.path.splitext(filename)[0] + '.png'
+                    output_path = os.path.join(output_dir, output_filename)
+                    tasks.append((filename, entry.path, output_path))
+        
+        if jobs == 1 or len(tasks) <= 1:
+            # Sin paralelismo: no compensa arrancar procesos
+            for filename, input_path, output_path in tasks:
                 try:
                     self.convert(input_path, output_path)
                     converted_files.append(output_path)
                 except Exception as e:
                     self.logger.error(f"Error al convertir {filename}: {str(e)}")
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                futures = [
+                    (filename, executor.submit(_convert_one, input_path, output_path, self.compress_level))
+                    for filename, input_path, output_path in tasks
+                ]
+                
+                # Recoger los resultados en el orden del directorio
+                for filename, future in futures:
+                    try:
+                        output_path = future.result()
+                        converted_files.append(output_path)
+                        self.logger.info(f"Convertido {filename} -> {output_path}")
+                    except Exception as e:
+                        self.logger.error(f"Error al convertir {filename}: {str(e)}")
         
         self.logger.info(f"Conversión de directorio completada. {len(converted_files)} archivos convertidos.")
         return converted_files
\ No newline at end of file